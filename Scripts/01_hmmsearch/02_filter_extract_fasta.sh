@@ -8,7 +8,7 @@
 #
 # Requiere:
 #   - domtblout en results/01_hmmsearch/<sample>/<sample>.domtblout
-#   - proteoma en data/proteomes/<sample>.faa (o .fasta)
+#   - proteoma en data/proteomes/<sample>.faa (o .fasta, opcionalmente .gz)
 #
 # Produce:
 #   results/01_hmmsearch/<sample>/
@@ -50,9 +50,10 @@ done
 PIPE_ROOT="$(pwd)"
 DOMTBL="${PIPE_ROOT}/results/01_hmmsearch/${SAMPLE}/${SAMPLE}.domtblout"
 
-# Proteoma: intenta .faa primero y luego .fasta/.fa
+# Proteoma: intenta .faa primero y luego .fasta/.fa (sin comprimir o .gz;
+# seqkit lee gzip directamente, no hace falta descomprimir a disco)
 PROTEOME=""
-for ext in faa fasta fa fna; do
+for ext in faa fasta fa fna faa.gz fasta.gz fa.gz fna.gz; do
   cand="${PIPE_ROOT}/data/proteomes/${SAMPLE}.${ext}"
   if [ -f "$cand" ]; then
     PROTEOME="$cand"
@@ -65,7 +66,7 @@ if [ ! -f "$DOMTBL" ]; then
   exit 1
 fi
 if [ -z "$PROTEOME" ]; then
-  echo "No se encuentra proteoma para sample '$SAMPLE' en data/proteomes/ (busqué .faa/.fasta/.fa/.fna)" >&2
+  echo "No se encuentra proteoma para sample '$SAMPLE' en data/proteomes/ (busqué .faa/.fasta/.fa/.fna[.gz])" >&2
   exit 1
 fi
 
@@ -110,11 +111,9 @@ awk -v col="$COL_IDX" -v thr="$THRESHOLD" '
 idcount=$(wc -l < "$IDS_FILE" | tr -d ' ')
 
 
-# 2) Extraer secuencias del proteoma con seqkit (regex anclada)
-tmp_re="$(mktemp)"
-awk '{print "^"$0"$"}' "$IDS_FILE" > "$tmp_re"
-seqkit grep -r -f "$tmp_re" "$PROTEOME" > "$OUT_FASTA"
-rm -f "$tmp_re"
+# 2) Extraer secuencias del proteoma con seqkit (match exacto por ID: una
+#    búsqueda en tabla hash por registro, en vez de probar cada regex ^id$)
+seqkit grep -f "$IDS_FILE" "$PROTEOME" > "$OUT_FASTA"
 
 #Para el reporte final
 seqcount=$(grep -c '^>' "$OUT_FASTA" || true)
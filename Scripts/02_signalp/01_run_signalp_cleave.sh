@@ -114,7 +114,8 @@ fi
 
 # Cortar FASTA y generar resumen
 python - <<PY
-import textwrap
+import mmap
+import os
 
 fasta_path = "$IN_FASTA"
 table_path = "$TMP_TABLE"
@@ -124,52 +125,66 @@ kept_path = "$KEPT_FASTA"
 summary_path = "$SUMMARY_TSV"
 keep_nosp = bool($KEEP_NOSP)
 
-# cargar posiciones SP (primera ocurrencia por seqid)
-cleavage = {}
+# cargar posiciones SP (primera ocurrencia por seqid); la tabla la genera
+# awk arriba (3 columnas, sin líneas vacías): un solo read() + splitlines()
 with open(table_path) as t:
-    for line in t:
-        line = line.strip()
-        if not line:
-            continue
-        seqid, sp_start, sp_end = line.split("\\t")
-        if seqid not in cleavage:
-            cleavage[seqid] = (int(sp_start), int(sp_end))
+    rows = [line.split("\\t") for line in t.read().splitlines() if line]
+cleavage = {}
+for seqid, sp_start, sp_end in rows:
+    if seqid not in cleavage:
+        cleavage[seqid] = (int(sp_start), int(sp_end))
 
 def read_fasta(path):
-    header_id = None
-    header_full = None
-    seq_lines = []
-    with open(path) as f:
-        for line in f:
-            line = line.rstrip("\\n")
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header_id is not None:
-                    yield header_id, header_full, "".join(seq_lines)
-                header_full = line[1:]
-                header_id = header_full.split()[0]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header_id is not None:
-            yield header_id, header_full, "".join(seq_lines)
-
-def write_fasta_record(handle, header, seq):
-    handle.write(f">{header}\\n")
-    for chunk in textwrap.wrap(seq, 60):
-        handle.write(chunk + "\\n")
+    # mmap del FASTA: los límites de registro se buscan con find("\\n>") y
+    # los saltos de línea de la secuencia se eliminan con translate (todo en C)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)  # lectura secuencial: read-ahead del kernel
+            n = len(mm)
+            h = 0 if mm[:1] == b">" else mm.find(b"\\n>") + 1
+            if h == 0 and mm[:1] != b">":
+                return
+            while True:
+                eol = mm.find(b"\\n", h)
+                if eol < 0:
+                    eol = n
+                nxt = mm.find(b"\\n>", eol)
+                end = n if nxt < 0 else nxt
+                # header y secuencia quedan en bytes (se escriben tal cual);
+                # solo el ID se decodifica para buscarlo en la tabla SP
+                header_full = mm[h + 1:eol].rstrip(b"\\r")
+                header_id = header_full.split(None, 1)[0].decode()  # solo el primer token
+                seq = mm[eol + 1:end].translate(None, b"\\r\\n")
+                yield header_id, header_full, seq
+                if nxt < 0:
+                    break
+                h = nxt + 1
+
+def fasta_record(header, seq, wrap=60):
+    # registro completo en bytes, secuencia envuelta a 'wrap' columnas
+    body = b"".join(seq[i:i + wrap] + b"\\n" for i in range(0, len(seq), wrap))
+    return b">" + header + b"\\n" + body
 
 n_trimmed = 0
 n_nosp = 0
 
-with open(trimmed_path, "w") as out_trim, \
-     open(nosp_path, "w") as out_nosp, \
+BUF = 1 << 20  # buffer de escritura de 1 MiB
+
+with open(trimmed_path, "wb", buffering=BUF) as out_trim, \
+     open(nosp_path, "wb", buffering=BUF) as out_nosp, \
      open(summary_path, "w") as out_sum:
 
     out_sum.write("seqid\\tsp_start\\tsp_end\\tcleavage_after_aa\\toriginal_len\\tnew_len\\n")
 
-    kept_handle = open(kept_path, "w") if keep_nosp else None
+    kept_handle = open(kept_path, "wb", buffering=BUF) if keep_nosp else None
+
+    # destinos decididos una sola vez (no se revisa -k en cada registro);
+    # cada registro se arma una vez y se escribe con write() en cada handle
+    sp_writes = (out_trim.write, kept_handle.write) if kept_handle else (out_trim.write,)
+    nosp_writes = (out_nosp.write, kept_handle.write) if kept_handle else (out_nosp.write,)
 
     for sid, full_header, seq in read_fasta(fasta_path):
         if sid in cleavage:
@@ -180,17 +195,16 @@ with open(trimmed_path, "w") as out_trim, \
             if len(new_seq) == 0:
                 continue
 
-            write_fasta_record(out_trim, full_header + " | signalp_cleaved", new_seq)
+            rec = fasta_record(full_header + b" | signalp_cleaved", new_seq)
+            for write in sp_writes:
+                write(rec)
             out_sum.write(f"{sid}\\t{sp_start}\\t{sp_end}\\t{cut_pos}\\t{len(seq)}\\t{len(new_seq)}\\n")
             n_trimmed += 1
-
-            if kept_handle is not None:
-                write_fasta_record(kept_handle, full_header + " | signalp_cleaved", new_seq)
         else:
             n_nosp += 1
-            write_fasta_record(out_nosp, full_header + " | no_signal_peptide", seq)
-            if kept_handle is not None:
-                write_fasta_record(kept_handle, full_header + " | no_signal_peptide", seq)
+            rec = fasta_record(full_header + b" | no_signal_peptide", seq)
+            for write in nosp_writes:
+                write(rec)
 
     if kept_handle is not None:
         kept_handle.close()
@@ -118,10 +118,8 @@ if [ "$idcount" -eq 0 ]; then
 fi
 
 # 3) se  extrae del FASTA secretado las secuencias que tienen el dominio
-tmp_re="$(mktemp)"
-awk '{print "^"$0"$"}' "$IDS" > "$tmp_re"
-seqkit grep -r -f "$tmp_re" "$IN_FASTA" > "$OUT_FASTA"
-rm -f "$tmp_re"
+#    (match exacto por ID: una búsqueda en tabla hash por registro)
+seqkit grep -f "$IDS" "$IN_FASTA" > "$OUT_FASTA"
 
 # Para el reporte final
 seqcount=$(grep -c '^>' "$OUT_FASTA" || true)
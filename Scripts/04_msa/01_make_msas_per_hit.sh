@@ -105,19 +105,28 @@ else
   MAFFT_ARGS=(--auto --thread "$CPU")
 fi
 
-for id in "${IDS[@]}"; do
-  # ID seguro para nombres de archivo
-  safe_id="$(echo "$id" | sed 's/[^A-Za-z0-9._-]/_/g')"
-
-  qfa="${QDIR}/${safe_id}.fasta"
+# Extraer todas las queries en UNA sola pasada sobre el FASTA (antes: un
+# seqkit grep completo por hit). El header decide el archivo de salida; awk
+# imprime cada archivo la primera vez que lo crea, y esa lista (no un nombre
+# recalculado con otra herramienta) es la que se recorre abajo. Headers
+# repetidos o que dan el mismo nombre seguro comparten archivo: referencias y
+# MAFFT una sola vez por archivo.
+mapfile -t QFILES < <(LC_ALL=C awk -v qdir="$QDIR" '
+  /^>/ {
+    if (out != "") close(out)
+    safe = substr($0, 2)
+    gsub(/[^A-Za-z0-9._-]/, "_", safe)
+    out = qdir "/" safe ".fasta"
+    if (out in seen) print >> out; else { print > out; seen[out] = 1; print out }
+    next
+  }
+  out != "" { print >> out }
+' "$IN_FASTA")
+
+for qfa in "${QFILES[@]}"; do
+  safe_id="$(basename "$qfa" .fasta)"
   aln="${ADIR}/${safe_id}_aln.fas"
 
-  # Extraer la secuencia de la query de forma robusta
-  tmp_id="${QDIR}/.tmp_id_${safe_id}.txt"
-  printf "%s\n" "$id" > "$tmp_id"
-  seqkit grep -n -f "$tmp_id" "$IN_FASTA" > "$qfa"
-  rm -f "$tmp_id"
-
   # Añadir referencias
   cat "$REFS_FASTA" >> "$qfa"
 
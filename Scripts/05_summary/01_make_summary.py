@@ -1,45 +1,191 @@
 #!/usr/bin/env python3
 import argparse
 import csv
+import functools
 import glob
+import gzip
+import hashlib
+import mmap
 import os
-import re
+import pickle
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+IO_BUFFER_SIZE = 1 << 20  # read buffer for the large text tables (domtblout)
+SEQ_WHITESPACE = b" \t\r\n"  # not residues: dropped before counting (like line.strip())
 
 # -------------------------
 # FASTA utilities (no deps)
 # -------------------------
-def read_fasta_lengths(path: str) -> Dict[str, int]:
-    """Return {seqid: length} using first token after '>' as seqid."""
+def read_fasta_lengths(path: str, ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Return {seqid: length} using first token after '>' as seqid.
+    The file is mmap'ed and scanned with find()/translate() between header lines
+    (no per-line Python loop); spaces, tabs, CR and newlines are not counted.
+    A duplicated seqid keeps the length of its first record (same rule in
+    the gzip and .fai paths).
+    If ids is given, only those records are measured and the scan stops as
+    soon as all of them have been seen.
+    """
     lengths: Dict[str, int] = {}
     if not path or (not os.path.isfile(path)) or os.path.getsize(path) == 0:
         return lengths
+    wanted = None if ids is None else {i.encode("utf-8") for i in ids}
+    if wanted is not None and not wanted:
+        return lengths
+    if is_gzip(path):
+        return _read_fasta_lengths_gz(path, wanted)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)  # one forward pass: let the kernel read ahead
+        n = len(mm)
+        # first '>' at the start of a line
+        h = 0 if mm[0] == 0x3E else mm.find(b"\n>") + 1
+        if h == 0 and mm[0] != 0x3E:
+            return lengths
+        while True:
+            eol = mm.find(b"\n", h)
+            if eol < 0:
+                eol = n
+            nxt = mm.find(b"\n>", eol)
+            tokens = mm[h + 1:eol].split(None, 1)
+            seqid = tokens[0] if tokens else b""
+            if wanted is None or seqid in wanted:
+                name = seqid.decode("utf-8", errors="replace")
+                if name not in lengths:
+                    end = n if nxt < 0 else nxt + 1
+                    seq = mm[min(eol + 1, end):end]
+                    lengths[name] = len(seq.translate(None, SEQ_WHITESPACE))
+                if wanted is not None:
+                    wanted.discard(seqid)
+                    if not wanted:
+                        break
+            if nxt < 0:
+                break
+            h = nxt + 1
+    return lengths
 
+def is_gzip(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+def _read_fasta_lengths_gz(path: str, wanted: Optional[set]) -> Dict[str, int]:
+    """Streaming variant of read_fasta_lengths() for gzip input (cannot be mmap'ed)."""
+    lengths: Dict[str, int] = {}
     seqid = None
     seqlen = 0
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
+    with gzip.open(path, "rb") as f:
         for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
+            if line[:1] == b">":
                 if seqid is not None:
-                    lengths[seqid] = seqlen
-                header = line[1:].strip()
-                seqid = header.split()[0]
+                    lengths.setdefault(seqid.decode("utf-8", errors="replace"), seqlen)
+                    if wanted is not None:
+                        wanted.discard(seqid)
+                        if not wanted:
+                            return lengths
+                tokens = line[1:].split(None, 1)
+                seqid = tokens[0] if tokens else b""
+                if wanted is not None and seqid not in wanted:
+                    seqid = None
                 seqlen = 0
-            else:
-                seqlen += len(line)
-        if seqid is not None:
-            lengths[seqid] = seqlen
+            elif seqid is not None:
+                seqlen += len(line.translate(None, SEQ_WHITESPACE))
+    if seqid is not None:
+        lengths.setdefault(seqid.decode("utf-8", errors="replace"), seqlen)
+    return lengths
+
+def find_fai(path: str) -> Optional[str]:
+    """Return an up-to-date samtools/seqkit faidx index next to path, if any."""
+    for fai in (path + ".fai", path + ".seqkit.fai"):
+        if os.path.isfile(fai) and os.path.getmtime(fai) >= os.path.getmtime(path):
+            return fai
+    return None
+
+def read_fai_lengths(fai_path: str) -> Dict[str, int]:
+    """{seqid: length} from a .fai index (name, length, offset, linebases, linewidth); first entry wins."""
+    lengths: Dict[str, int] = {}
+    with open(fai_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.split("\t", 2)
+            if len(parts) < 2:
+                continue
+            tokens = parts[0].split(None, 1)
+            if not tokens:
+                continue
+            try:
+                lengths.setdefault(tokens[0], int(parts[1]))
+            except ValueError:
+                continue
+    return lengths
+
+FileKey = Tuple[str, int, int]
+
+def file_key(path: str) -> Optional[FileKey]:
+    """(realpath, mtime_ns, size) identity of a file, or None if it does not exist."""
+    if not path or not os.path.isfile(path):
+        return None
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    return (real, st.st_mtime_ns, st.st_size)
+
+def cached_fasta_lengths(path: str, cache_dir: Optional[str] = None,
+                         ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    read_fasta_lengths() with an on-disk cache.
+    If cache_dir is given, results are pickled there (one file per realpath,
+    overwritten when the FASTA changes) together with the (realpath,
+    mtime_ns, size) key, so re-runs skip unchanged files.
+    If an up-to-date .fai/.seqkit.fai index sits next to the FASTA, lengths
+    are read from it instead of scanning the sequences.
+    ids only matters without cache_dir: then just those records are
+    measured (early exit). With cache_dir the whole file is scanned once and
+    pickled, so later runs skip it entirely.
+    """
+    key = file_key(path)
+    if key is None:
+        return {}
+    real = key[0]
+
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.sha1(real.encode("utf-8")).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{digest}.pkl")
+        if os.path.isfile(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    cached_key, lengths = pickle.load(f)
+                if cached_key == key:
+                    return lengths
+            except Exception:
+                pass  # corrupt/old-format cache entry -> recompute
+
+    # An existing faidx index already holds every length: no FASTA scan at all
+    fai = find_fai(real)
+    if fai is not None:
+        return read_fai_lengths(fai)
+
+    if ids is not None and not cache_path:
+        return read_fasta_lengths(real, ids)
+
+    lengths = read_fasta_lengths(real)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump((key, lengths), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass  # cache is best-effort
     return lengths
 
 # -------------------------
 # Parse domtblout (HMMER)
 # -------------------------
-@dataclass
-class DomHit:
+class DomHit(NamedTuple):  # tuple-backed: no per-hit __dict__ (py3.7+)
     target_name: str
     target_acc: str
     query_name: str
@@ -59,60 +205,50 @@ class DomHit:
     acc: float
     desc: str
 
-def parse_domtblout(path: str) -> List[DomHit]:
-    hits: List[DomHit] = []
+def parse_domtblout(path: str, acc_prefix: Optional[str] = None) -> Iterator[DomHit]:
+    """
+    Yield one DomHit per domain row (streams the file, nothing is materialized).
+    If acc_prefix is given, rows whose target accession (column 2) does not
+    start with it are skipped before any numeric conversion.
+    """
     if not os.path.isfile(path) or os.path.getsize(path) == 0:
-        return hits
+        return
 
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
+    with open(path, "r", encoding="utf-8", errors="replace", buffering=IO_BUFFER_SIZE) as f:
         for line in f:
             if not line or line.startswith("#"):
                 continue
-            parts = line.rstrip("\n").split()
+            parts = line.split(None, 22)  # description stays in parts[22]
             if len(parts) < 22:
                 continue
+            if acc_prefix is not None and not parts[1].startswith(acc_prefix):
+                continue
 
+            # Positional construction in DomHit field order; the numeric column
+            # slices are converted with map() so the conversion loop runs in C.
             try:
-                target_name = parts[0]
-                target_acc = parts[1]
-                query_name = parts[3]
-                query_acc = parts[4]
-                full_evalue = float(parts[6].replace("E", "e"))
-                full_score = float(parts[7])
-                full_bias = float(parts[8])
-                dom_ievalue = float(parts[12].replace("E", "e"))
-                dom_score = float(parts[13])
-                dom_bias = float(parts[14])
-                hmm_from = int(parts[15]); hmm_to = int(parts[16])
-                ali_from = int(parts[17]); ali_to = int(parts[18])
-                env_from = int(parts[19]); env_to = int(parts[20])
-                acc = float(parts[21])
-                desc = " ".join(parts[22:]) if len(parts) > 22 else ""
+                hit = DomHit(
+                    parts[0], parts[1], parts[3], parts[4],
+                    *map(float, parts[6:9]),      # full sequence: E-value, score, bias
+                    *map(float, parts[12:15]),    # this domain: i-Evalue, score, bias
+                    *map(int, parts[15:21]),      # hmm / ali / env coords
+                    float(parts[21]),
+                    parts[22].rstrip() if len(parts) > 22 else "",
+                )
             except Exception:
                 continue
-
-            hits.append(DomHit(
-                target_name=target_name, target_acc=target_acc,
-                query_name=query_name, query_acc=query_acc,
-                full_evalue=full_evalue, full_score=full_score, full_bias=full_bias,
-                dom_ievalue=dom_ievalue, dom_score=dom_score, dom_bias=dom_bias,
-                hmm_from=hmm_from, hmm_to=hmm_to, ali_from=ali_from, ali_to=ali_to,
-                env_from=env_from, env_to=env_to, acc=acc, desc=desc
-            ))
-    return hits
+            yield hit
 
 def best_hmmsearch_per_seq(domtbl_path: str) -> Dict[str, DomHit]:
     """Return best domain hit per target sequence (min dom_ievalue, tie -> max dom_score)."""
-    best: Dict[str, DomHit] = {}
+    best: Dict[str, Tuple[Tuple[float, float], DomHit]] = {}
     for h in parse_domtblout(domtbl_path):
         key = h.target_name
-        if key not in best:
-            best[key] = h
-        else:
-            cur = best[key]
-            if (h.dom_ievalue < cur.dom_ievalue) or (h.dom_ievalue == cur.dom_ievalue and h.dom_score > cur.dom_score):
-                best[key] = h
-    return best
+        k = (h.dom_ievalue, -h.dom_score)
+        prev = best.get(key)
+        if prev is None or k < prev[0]:
+            best[key] = (k, h)
+    return {key: v[1] for key, v in best.items()}
 
 def best_pfam_for_accession(domtbl_path: str, pfam_id: str) -> Dict[str, DomHit]:
     """
@@ -121,19 +257,16 @@ def best_pfam_for_accession(domtbl_path: str, pfam_id: str) -> Dict[str, DomHit]
     We'll match target accession like PF01083.23 -> PF01083
     """
     pfam_id = pfam_id.strip()
-    best: Dict[str, DomHit] = {}
-    for h in parse_domtblout(domtbl_path):
-        acc = re.sub(r"\..*$", "", h.target_acc)  # PF01083.23 -> PF01083
-        if acc != pfam_id:
+    best: Dict[str, Tuple[Tuple[float, float], DomHit]] = {}
+    for h in parse_domtblout(domtbl_path, acc_prefix=pfam_id):
+        if h.target_acc.partition(".")[0] != pfam_id:  # PF01083.23 -> PF01083
             continue
         q = h.query_name  # query is protein id
-        if q not in best:
-            best[q] = h
-        else:
-            cur = best[q]
-            if (h.dom_ievalue < cur.dom_ievalue) or (h.dom_ievalue == cur.dom_ievalue and h.dom_score > cur.dom_score):
-                best[q] = h
-    return best
+        k = (h.dom_ievalue, -h.dom_score)
+        prev = best.get(q)
+        if prev is None or k < prev[0]:
+            best[q] = (k, h)
+    return {q: v[1] for q, v in best.items()}
 
 # -------------------------
 # SignalP summary parser
@@ -161,7 +294,7 @@ def parse_signalp_summary(tsv_path: str) -> Dict[str, SignalPSummary]:
                 continue
 
             # IMPORTANT: ensure seqid matches FASTA first-token IDs
-            sid = parts[0].split()[0]
+            sid = parts[0].split(None, 1)[0]
 
             try:
                 sp_start = int(parts[1])
@@ -189,15 +322,120 @@ def find_repo_root() -> str:
         here = parent
     return os.getcwd()
 
+# Column order of the summary CSV; make_row() must follow it
+FIELDNAMES = [
+    "sample","sequence_id",
+    "length_original_aa","length_secreted_trimmed_aa","length_final_selected_aa",
+
+    "hmm_query","hmm_full_evalue","hmm_full_bitscore","hmm_domain_ievalue","hmm_domain_bitscore",
+    "hmm_ali_from","hmm_ali_to","hmm_hmm_from","hmm_hmm_to","hmm_acc",
+
+    "has_signal_peptide","signalp_start","signalp_end","signalp_cleavage_after_aa","signalp_mature_length_aa",
+
+    "pfam_accession","pfam_hit","pfam_evalue_full","pfam_bitscore_full","pfam_domain_ievalue","pfam_domain_bitscore",
+    "pfam_ali_from","pfam_ali_to","pfam_desc",
+]
+
+def _hmm_fields(hmm: DomHit) -> Tuple:
+    return (
+        hmm.query_name, hmm.full_evalue, hmm.full_score, hmm.dom_ievalue, hmm.dom_score,
+        hmm.ali_from, hmm.ali_to, hmm.hmm_from, hmm.hmm_to, hmm.acc,
+    )
+
+def _sp_fields(sp: SignalPSummary) -> Tuple:
+    return ("yes", sp.sp_start, sp.sp_end, sp.cleavage_after_aa, sp.new_len)
+
+def _pf_fields(pf: DomHit) -> Tuple:
+    return (
+        pf.target_name, pf.full_evalue, pf.full_score, pf.dom_ievalue, pf.dom_score,
+        pf.ali_from, pf.ali_to, pf.desc,
+    )
+
+# Column blocks used when a sequence has no hit / no signal peptide
+EMPTY_HMM_FIELDS: Tuple = ("",) * 10
+EMPTY_SP_FIELDS: Tuple = ("no", "", "", "", "")
+EMPTY_PF_FIELDS: Tuple = ("",) * 8
+
+def make_row(sample: str, sid: str, pfam_id: str,
+             hmm: Optional[DomHit], pf: Optional[DomHit], sp: Optional[SignalPSummary],
+             orig_len_val, trimmed_len_val, sel_len_val) -> Tuple:
+    """Return one summary row as a tuple in FIELDNAMES order."""
+    return (
+        (sample, sid, orig_len_val, trimmed_len_val, sel_len_val)       # lengths
+        + (_hmm_fields(hmm) if hmm is not None else EMPTY_HMM_FIELDS)   # HMMER (hmmsearch)
+        + (_sp_fields(sp) if sp is not None else EMPTY_SP_FIELDS)       # SignalP
+        + (pfam_id,)
+        + (_pf_fields(pf) if pf is not None else EMPTY_PF_FIELDS)       # Pfam (cutinase domain)
+    )
+
+def process_sample(root: str, sel_fa: str, pfam_id: str, cache_dir: Optional[str] = None) -> List[Tuple]:
+    """Build the summary rows for one sample (module-level so it can run in a worker process)."""
+    rows: List[Tuple] = []
+    sample = os.path.basename(os.path.dirname(sel_fa))
+
+    # Per-sample paths
+    hmm_domtbl = os.path.join(root, "results", "01_hmmsearch", sample, f"{sample}.domtblout")
+    signalp_tsv = os.path.join(root, "results", "02_signalp", sample, f"{sample}_signalP_summary.tsv")
+    trimmed_fa = os.path.join(root, "results", "02_signalp", sample, f"{sample}_signalp_trimmed.fasta")
+    pfam_domtbl = os.path.join(root, "results", "03_pfam", sample, f"{sample}_pfam.domtblout")
+
+    # Original proteome (optional)
+    orig_prot = None
+    for ext in ("faa", "fasta", "fa", "fna", "faa.gz", "fasta.gz", "fa.gz", "fna.gz"):
+        cand = os.path.join(root, "data", "proteomes", f"{sample}.{ext}")
+        if os.path.isfile(cand):
+            orig_prot = cand
+            break
+
+    # Load maps. Stages 02/03 rewrite the selected/trimmed FASTAs on every
+    # pipeline run (new mtime), so only the proteome goes through the cache.
+    selected_len = read_fasta_lengths(sel_fa)
+
+    trimmed_len = read_fasta_lengths(trimmed_fa)
+    # whole proteome: pickled once with the cache, else only the selected ids are measured
+    original_len = cached_fasta_lengths(orig_prot, cache_dir, ids=selected_len) if orig_prot else {}
+
+    sig = parse_signalp_summary(signalp_tsv)
+    hmm_best = best_hmmsearch_per_seq(hmm_domtbl) if os.path.isfile(hmm_domtbl) else {}
+    pf_best = best_pfam_for_accession(pfam_domtbl, pfam_id) if os.path.isfile(pfam_domtbl) else {}
+
+    # selected FASTA order drives the rows; its length comes with the id
+    for sid, sel_len_val in selected_len.items():
+        sp = sig.get(sid)
+
+        # Fill original length: prefer original proteome, else use SignalP TSV
+        orig_len_val = original_len.get(sid, "")
+        if (orig_len_val == "" or orig_len_val is None) and sp is not None:
+            orig_len_val = sp.original_len
+
+        rows.append(make_row(
+            sample, sid, pfam_id, hmm_best.get(sid), pf_best.get(sid), sp,
+            orig_len_val, trimmed_len.get(sid, ""), sel_len_val,
+        ))
+    return rows
+
+def bounded_map(ex: ProcessPoolExecutor, fn, items: List[str], window: int) -> Iterator:
+    """Like ex.map(fn, items) (results in order), but keeps at most window + 1 tasks in flight."""
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(ex.submit(fn, item))
+        if len(pending) > window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
 def main():
     ap = argparse.ArgumentParser(description="Build a CSV summary table for selected cutinase candidates.")
     ap.add_argument("--pfam", required=True, help="Pfam accession to select (e.g., PF01083)")
     ap.add_argument("--out", default="results/summary/cutinase_candidates_summary.csv", help="Output CSV path")
+    ap.add_argument("--jobs", type=int, default=0, help="Worker processes for per-sample parsing (default: all CPUs; 1 = serial)")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read/write the proteome length cache (results/.cache/fasta_lengths)")
     args = ap.parse_args()
 
     root = find_repo_root()
     out_csv = os.path.join(root, args.out)
     os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    cache_dir = None if args.no_cache else os.path.join(root, "results", ".cache", "fasta_lengths")
 
     # Samples determined by existence of final selected FASTA
     selected_glob = os.path.join(root, "results", "03_pfam", "*", "*_pfam_filtered.fasta")
@@ -209,107 +447,36 @@ def main():
             f"¿Ya corriste etapa 03 (Pfam) y se generó <sample>_pfam_filtered.fasta?"
         )
 
-    rows: List[Dict[str, object]] = []
-
-    for sel_fa in selected_fastas:
-        sample = os.path.basename(os.path.dirname(sel_fa))
-
-        # Per-sample paths
-        hmm_domtbl = os.path.join(root, "results", "01_hmmsearch", sample, f"{sample}.domtblout")
-        signalp_tsv = os.path.join(root, "results", "02_signalp", sample, f"{sample}_signalP_summary.tsv")
-        trimmed_fa = os.path.join(root, "results", "02_signalp", sample, f"{sample}_signalp_trimmed.fasta")
-        pfam_domtbl = os.path.join(root, "results", "03_pfam", sample, f"{sample}_pfam.domtblout")
-
-        # Original proteome (optional)
-        orig_prot = None
-        for ext in ("faa", "fasta", "fa", "fna"):
-            cand = os.path.join(root, "data", "proteomes", f"{sample}.{ext}")
-            if os.path.isfile(cand):
-                orig_prot = cand
-                break
-
-        # Load maps
-        selected_len = read_fasta_lengths(sel_fa)
-        selected_ids = list(selected_len.keys())
-
-        trimmed_len = read_fasta_lengths(trimmed_fa)
-        original_len = read_fasta_lengths(orig_prot) if orig_prot else {}
-
-        sig = parse_signalp_summary(signalp_tsv)
-        hmm_best = best_hmmsearch_per_seq(hmm_domtbl) if os.path.isfile(hmm_domtbl) else {}
-        pf_best = best_pfam_for_accession(pfam_domtbl, args.pfam) if os.path.isfile(pfam_domtbl) else {}
-
-        for sid in selected_ids:
-            hmm = hmm_best.get(sid)
-            pf = pf_best.get(sid)
-            sp = sig.get(sid)
-
-            # Fill original length: prefer original proteome, else use SignalP TSV
-            orig_len_val = original_len.get(sid, "")
-            if (orig_len_val == "" or orig_len_val is None) and sp is not None:
-                orig_len_val = sp.original_len
-
-            row = {
-                "sample": sample,
-                "sequence_id": sid,
-
-                # lengths
-                "length_original_aa": orig_len_val,
-                "length_secreted_trimmed_aa": trimmed_len.get(sid, ""),
-                "length_final_selected_aa": selected_len.get(sid, ""),
-
-                # HMMER (hmmsearch)
-                "hmm_query": getattr(hmm, "query_name", ""),
-                "hmm_full_evalue": getattr(hmm, "full_evalue", ""),
-                "hmm_full_bitscore": getattr(hmm, "full_score", ""),
-                "hmm_domain_ievalue": getattr(hmm, "dom_ievalue", ""),
-                "hmm_domain_bitscore": getattr(hmm, "dom_score", ""),
-                "hmm_ali_from": getattr(hmm, "ali_from", ""),
-                "hmm_ali_to": getattr(hmm, "ali_to", ""),
-                "hmm_hmm_from": getattr(hmm, "hmm_from", ""),
-                "hmm_hmm_to": getattr(hmm, "hmm_to", ""),
-                "hmm_acc": getattr(hmm, "acc", ""),
-
-                # SignalP
-                "has_signal_peptide": "yes" if sp is not None else "no",
-                "signalp_start": getattr(sp, "sp_start", ""),
-                "signalp_end": getattr(sp, "sp_end", ""),
-                "signalp_cleavage_after_aa": getattr(sp, "cleavage_after_aa", ""),
-                "signalp_mature_length_aa": getattr(sp, "new_len", ""),
-
-                # Pfam (cutinase domain)
-                "pfam_accession": args.pfam,
-                "pfam_hit": getattr(pf, "target_name", ""),
-                "pfam_evalue_full": getattr(pf, "full_evalue", ""),
-                "pfam_bitscore_full": getattr(pf, "full_score", ""),
-                "pfam_domain_ievalue": getattr(pf, "dom_ievalue", ""),
-                "pfam_domain_bitscore": getattr(pf, "dom_score", ""),
-                "pfam_ali_from": getattr(pf, "ali_from", ""),
-                "pfam_ali_to": getattr(pf, "ali_to", ""),
-                "pfam_desc": getattr(pf, "desc", ""),
-            }
-            rows.append(row)
-
-    fieldnames = [
-        "sample","sequence_id",
-        "length_original_aa","length_secreted_trimmed_aa","length_final_selected_aa",
-
-        "hmm_query","hmm_full_evalue","hmm_full_bitscore","hmm_domain_ievalue","hmm_domain_bitscore",
-        "hmm_ali_from","hmm_ali_to","hmm_hmm_from","hmm_hmm_to","hmm_acc",
-
-        "has_signal_peptide","signalp_start","signalp_end","signalp_cleavage_after_aa","signalp_mature_length_aa",
-
-        "pfam_accession","pfam_hit","pfam_evalue_full","pfam_bitscore_full","pfam_domain_ievalue","pfam_domain_bitscore",
-        "pfam_ali_from","pfam_ali_to","pfam_desc",
-    ]
-
-    with open(out_csv, "w", newline="", encoding="utf-8") as out:
-        w = csv.DictWriter(out, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
-    print(f"OK: wrote {len(rows)} rows -> {out_csv}")
+    jobs = args.jobs if args.jobs and args.jobs > 0 else (os.cpu_count() or 1)
+    work = functools.partial(process_sample, root, pfam_id=args.pfam, cache_dir=cache_dir)
+    n_rows = 0
+
+    # Rows are written in sample order as each sample finishes. The serial path
+    # holds one sample in memory; the parallel path at most workers + 1
+    # (bounded_map() instead of ex.map(), which submits every sample up front).
+    # The CSV is built in a .tmp file and only replaces out_csv on success.
+    tmp_csv = out_csv + ".tmp"
+    try:
+        with open(tmp_csv, "w", newline="", encoding="utf-8") as out:
+            w = csv.writer(out)
+            w.writerow(FIELDNAMES)
+            if jobs == 1 or len(selected_fastas) == 1:
+                for rows_part in map(work, selected_fastas):
+                    w.writerows(rows_part)
+                    n_rows += len(rows_part)
+            else:
+                workers = min(jobs, len(selected_fastas))
+                with ProcessPoolExecutor(max_workers=workers) as ex:
+                    for rows_part in bounded_map(ex, work, selected_fastas, workers):
+                        w.writerows(rows_part)
+                        n_rows += len(rows_part)
+        os.replace(tmp_csv, out_csv)
+    except BaseException:
+        if os.path.exists(tmp_csv):
+            os.remove(tmp_csv)
+        raise
+
+    print(f"OK: wrote {n_rows} rows -> {out_csv}")
 
 if __name__ == "__main__":
     main()
@@ -48,9 +48,11 @@ done
 
 # 2) Lista de proteomas
 shopt -s nullglob
-PROTEOMES=(data/proteomes/*.faa data/proteomes/*.fasta data/proteomes/*.fa)
+# (también comprimidos .gz: hmmsearch, seqkit y el resumen los leen directo)
+PROTEOMES=(data/proteomes/*.faa data/proteomes/*.fasta data/proteomes/*.fa \
+           data/proteomes/*.faa.gz data/proteomes/*.fasta.gz data/proteomes/*.fa.gz)
 if [ "${#PROTEOMES[@]}" -eq 0 ]; then
-  echo "ERROR: No encuentro proteomas en data/proteomes/ (.faa/.fasta/.fa)" >&2
+  echo "ERROR: No encuentro proteomas en data/proteomes/ (.faa/.fasta/.fa[.gz])" >&2
   exit 1
 fi
 
@@ -106,6 +108,6 @@ done
 echo
 echo "Generando CSV resumen global..."
 conda run -n "$CUTINASE_ENV" \
-  python "$SUMMARY_SCRIPT" --pfam "$CUTINASE_PFAM"
+  python "$SUMMARY_SCRIPT" --pfam "$CUTINASE_PFAM" --jobs "$CPU"
 
 echo "LISTO ✅  Revisa: results/summary/cutinase_candidates_summary.csv"